@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del panel se importan como utils.*, igual que al lanzar app.py desde dashboard-tips
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
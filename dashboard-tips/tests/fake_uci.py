@@ -0,0 +1,39 @@
+"""Motor UCI mínimo para las pruebas: evalúa cada posición con un número derivado de su FEN.
+
+Como la tabla hash de un motor real, el resultado depende también de cuántas posiciones se han
+analizado desde el último ucinewgame.
+"""
+import hashlib
+import sys
+
+import chess
+
+board = chess.Board()
+searched = 0
+for line in sys.stdin:
+    command = line.split()
+    if not command:
+        continue
+    if command[0] == "uci":
+        print("id name FakeFish")
+        print("uciok")
+    elif command[0] == "ucinewgame":
+        searched = 0
+    elif command[0] == "isready":
+        print("readyok")
+    elif command[0] == "position":
+        if command[1] == "startpos":
+            board, rest = chess.Board(), command[2:]
+        else:
+            board, rest = chess.Board(" ".join(command[2:8])), command[8:]
+        for move in rest[1:]:
+            board.push_uci(move)
+    elif command[0] == "go":
+        depth = int(command[command.index("depth") + 1]) if "depth" in command else 1
+        score = int(hashlib.md5(board.fen().encode()).hexdigest(), 16) % 400 - 200 + searched % 3
+        searched += 1
+        print(f"info depth {depth} score cp {score} nodes {depth * 1000}")
+        print("bestmove (none)")
+    elif command[0] == "quit":
+        break
+    sys.stdout.flush()
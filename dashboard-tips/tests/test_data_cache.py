@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from utils.data_cache import DataCache
+from utils.tournament_registry import TournamentRegistry
+
+
+def test_registry_invalidates_stale_tournament_data():
+    collection = mongomock.MongoClient()["ChessTournamentAnalysis"]["Tournaments"]
+    updated = collection.insert_one({"Name": "A", "DataVersion": 1}).inserted_id
+    unchanged = collection.insert_one({"Name": "B", "DataVersion": 1}).inserted_id
+
+    cache = DataCache()
+    registry = TournamentRegistry(collection, min_interval=0, on_version_change=cache.invalidate)
+    registry.refresh()
+    frame = pd.DataFrame({"Elo": range(100)})
+    cache.get(updated, registry.version(updated), "details", lambda: frame)
+    cache.get(unchanged, registry.version(unchanged), "details", lambda: frame)
+
+    collection.update_one({"_id": updated}, {"$inc": {"DataVersion": 1}})
+    registry.refresh()
+
+    assert registry.version(updated) == 2
+    assert [key[0] for key in cache.entries] == [unchanged]
+    assert cache.stats()["bytes"] == cache.entries[(unchanged, 1, "details")][1]
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import chess.engine
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from utils.engine_manager import EngineManager
+from utils.eval_cache import EvalCache, cache_entry
+from utils.pgn_to_mongo import insert_pgn_to_mongo
+
+FAKE_ENGINE = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_uci.py")]
+
+# Aperturas repetidas y transposiciones: muchas posiciones aparecen en varias partidas
+MOVETEXTS = [
+    "1. d4 Nf6 2. c4 e6 3. Nc3 Bb4 4. Qc2 d5",
+    "1. c4 e6 2. d4 Nf6 3. Nc3 Bb4 4. e3 O-O",
+    "1. d4 Nf6 2. c4 e6 3. Nf3 d5 4. Nc3 Be7",
+    "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Ba4 Nf6",
+    "1. Nf3 Nf6 2. c4 e6 3. d4 Bb4+ 4. Bd2 Qe7",
+    "1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. c3 Nf6",
+    "1. d4 d5 2. c4 e6 3. Nc3 Nf6 4. Bg5 Be7",
+    "1. e4 e5 2. Nf3 Nc6 3. Bb5 Nf6 4. O-O Nxe4"
+]
+
+
+def pgn_text():
+    return "\n".join(
+        f'[Event "Prueba"]\n[Round "{i}"]\n[White "A"]\n[Black "B"]\n[Result "*"]\n\n{moves} *\n'
+        for i, moves in enumerate(MOVETEXTS, start=1)
+    )
+
+
+def import_with_workers(pgn_file, workers):
+    db = mongomock.MongoClient()["ChessTournamentAnalysis"]
+    engines = EngineManager(FAKE_ENGINE, size=workers)
+    try:
+        summary = insert_pgn_to_mongo(str(pgn_file), "Prueba", FAKE_ENGINE, 3, workers=workers,
+                                      engine_manager=engines, db=db)
+    finally:
+        engines.close()
+
+    games = {doc["_id"]: doc["Round"] for doc in db.Details.find()}
+    moves = sorted((games[doc["GameId"]], doc["Move Number"], doc["Color"], doc["Evaluation"], doc["Depth"])
+                   for doc in db.Moves.find())
+    cache = sorted((doc["_id"]["Engine"], doc["_id"]["Position"], doc["Score"], doc["Depth"]) for doc in db.EvalCache.find())
+    return summary, moves, cache
+
+
+def test_cached_import_does_not_depend_on_workers(tmp_path):
+    pgn_file = tmp_path / "torneo.pgn"
+    pgn_file.write_text(pgn_text())
+
+    serial_summary, serial_moves, serial_cache = import_with_workers(pgn_file, 1)
+    parallel_summary, parallel_moves, parallel_cache = import_with_workers(pgn_file, 3)
+
+    assert serial_summary["games"] == parallel_summary["games"] == len(MOVETEXTS)
+    assert serial_moves == parallel_moves
+    assert serial_cache and serial_cache == parallel_cache
+
+
+def test_entries_are_not_shared_between_engines():
+    collection = mongomock.MongoClient()["ChessTournamentAnalysis"]["EvalCache"]
+    stockfish = EvalCache(collection, "Stockfish 17.1 Hash=64 Threads=1")
+    stockfish.put(42, cache_entry(chess.engine.Cp(35), 12))
+    stockfish.flush()
+
+    assert list(EvalCache(collection, "Stockfish 17.1 Hash=64 Threads=1").get_many([42], 12)) == [42]
+    assert EvalCache(collection, "Stockfish 17.1 Hash=256 Threads=1").get_many([42], 12) == {}
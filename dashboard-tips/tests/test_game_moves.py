@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from utils.engine_manager import EngineManager
+from utils.game_moves import migrate_to_games, migrate_to_moves
+from utils.pgn_to_mongo import insert_pgn_to_mongo
+
+FAKE_ENGINE = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_uci.py")]
+PGN = ('[Event "Prueba"]\n[Round "1"]\n[White "A"]\n[Black "B"]\n[Result "1-0"]\n\n1. e4 e5 2. Nf3 Nc6 1-0\n\n'
+       '[Event "Prueba"]\n[Round "2"]\n[White "B"]\n[Black "A"]\n[Result "0-1"]\n\n1. d4 d5 0-1\n')
+
+
+def test_migrations_bump_data_version(tmp_path):
+    pgn_file = tmp_path / "torneo.pgn"
+    pgn_file.write_text(PGN)
+    db = mongomock.MongoClient()["ChessTournamentAnalysis"]
+    engines = EngineManager(FAKE_ENGINE)
+    try:
+        tournament_id = insert_pgn_to_mongo(str(pgn_file), "Prueba", FAKE_ENGINE, 2, use_cache=False,
+                                            engine_manager=engines, db=db)["tournament_id"]
+    finally:
+        engines.close()
+
+    def version():
+        return db.Tournaments.find_one({"_id": tournament_id})["DataVersion"]
+
+    imported = version()
+    moves = sorted((doc["GameId"], doc["Move Number"], doc["Color"], doc["Move"]) for doc in db.Moves.find({}, {"_id": 0}))
+
+    assert migrate_to_games(db, tournament_id) == 2
+    assert db.Moves.count_documents({}) == 0
+    assert version() > imported
+
+    migrated = version()
+    assert migrate_to_moves(db, tournament_id) == 2
+    assert version() > migrated
+    assert sorted((doc["GameId"], doc["Move Number"], doc["Color"], doc["Move"]) for doc in db.Moves.find()) == moves
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+from bson import ObjectId
+
+mongomock = pytest.importorskip("mongomock")
+
+from utils.benchmark import general_stats_with_aggregation, general_stats_with_pandas, same_stats
+from utils.engine_manager import EngineManager
+from utils.pgn_to_mongo import insert_pgn_to_mongo
+
+FAKE_ENGINE = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_uci.py")]
+
+# Tres aperturas con dos partidas cada una: el orden entre ellas sale solo del desempate
+GAMES = [
+    ("1.1", "A", "B", "C20", "Apertura X", "1-0", "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Ba4 Nf6 5. O-O Be7 6. Re1 b5"),
+    ("1.2", "C", "D", "D02", "Apertura Y", "0-1", "1. d4 d5"),
+    ("1.3", "E", "F", "E35", "Apertura Z", "1/2-1/2", "1. d4 Nf6 2. c4 e6 3. Nc3 Bb4 4. Qc2 d5 5. cxd5 exd5"),
+    ("2.1", "B", "C", "E35", "Apertura Z", "1-0", "1. d4 Nf6"),
+    ("2.2", "D", "E", "D02", "Apertura Y", "1/2-1/2", "1. d4 d5 2. Nf3 Nf6 3. e3 e6 4. Bd3 c5 5. O-O Nc6"),
+    ("2.3", "F", "A", "C20", "Apertura X", "0-1", "1. e4 e5")
+]
+
+
+def pgn_text():
+    games = []
+    for round_, white, black, eco, opening, result, moves in GAMES:
+        games.append(
+            f'[Event "Prueba"]\n[Round "{round_}"]\n[White "{white}"]\n[Black "{black}"]\n'
+            f'[WhiteFideId "{white}"]\n[BlackFideId "{black}"]\n[WhiteElo "2000"]\n[BlackElo "2100"]\n'
+            f'[ECO "{eco}"]\n[Opening "{opening}"]\n[Result "{result}"]\n\n{moves} {result}\n'
+        )
+    return "\n".join(games)
+
+
+def details_documents(tournament_id, ids):
+    docs = []
+    for _id, (round_, white, black, eco, opening, result, _) in zip(ids, GAMES):
+        docs.append({"_id": _id, "TournamentId": tournament_id, "Round": round_, "White": white, "Black": black,
+                     "ECO": eco, "OpeningName": opening, "Result": result})
+    return docs
+
+
+def players_documents(tournament_id):
+    return [{"Name": name, "FideId": name, "Elo": 2000, "TournamentId": tournament_id} for name in "ABCDEF"]
+
+
+def test_tied_openings_match_when_ids_do_not_follow_insertion_order():
+    db = mongomock.MongoClient()["ChessTournamentAnalysis"]
+    tournament_id = ObjectId()
+    ids = [ObjectId() for _ in GAMES]
+    # La tercera partida recibe el _id más pequeño, aunque se guarda en su sitio
+    ids[0], ids[2] = ids[2], ids[0]
+    db.Details.insert_many(details_documents(tournament_id, ids))
+    db.Players.insert_many(players_documents(tournament_id))
+
+    pandas_stats = general_stats_with_pandas(db, tournament_id)
+    mongo_stats = general_stats_with_aggregation(db, tournament_id)
+
+    assert list(pandas_stats["openings"]["Tooltip"]) == ["E35 - Apertura Z", "D02 - Apertura Y", "C20 - Apertura X"]
+    assert same_stats(pandas_stats, mongo_stats)
+
+
+def test_unfinished_games_do_not_score_in_either_path():
+    db = mongomock.MongoClient()["ChessTournamentAnalysis"]
+    tournament_id = ObjectId()
+    docs = details_documents(tournament_id, [ObjectId() for _ in GAMES])
+    docs.append({**docs[0], "_id": ObjectId(), "Round": "3.1", "Result": "*"})
+    db.Details.insert_many(docs)
+    db.Players.insert_many(players_documents(tournament_id))
+
+    pandas_stats = general_stats_with_pandas(db, tournament_id)
+    mongo_stats = general_stats_with_aggregation(db, tournament_id)
+
+    assert pandas_stats["standings"]["Games"].sum() == 2 * len(GAMES)
+    assert same_stats(pandas_stats, mongo_stats)
+
+
+def test_parallel_import_keeps_pgn_order(tmp_path):
+    pgn_file = tmp_path / "torneo.pgn"
+    pgn_file.write_text(pgn_text())
+    db = mongomock.MongoClient()["ChessTournamentAnalysis"]
+
+    engines = EngineManager(FAKE_ENGINE, size=2)
+    try:
+        summary = insert_pgn_to_mongo(str(pgn_file), "Prueba", FAKE_ENGINE, 2, workers=2, use_cache=False,
+                                      engine_manager=engines, db=db)
+    finally:
+        engines.close()
+
+    assert summary["games"] == len(GAMES)
+    rounds = [doc["Round"] for doc in db.Details.find().sort("_id", 1)]
+    assert rounds == [game[0] for game in GAMES]
+
+    tournament_id = summary["tournament_id"]
+    pandas_stats = general_stats_with_pandas(db, tournament_id)
+    assert list(pandas_stats["openings"]["Tooltip"]) == ["C20 - Apertura X", "D02 - Apertura Y", "E35 - Apertura Z"]
+    assert same_stats(pandas_stats, general_stats_with_aggregation(db, tournament_id))
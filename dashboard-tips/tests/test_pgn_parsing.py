@@ -0,0 +1,23 @@
+import io
+
+import chess.pgn
+import pytest
+
+from utils.pgn_parsing import GameRecordVisitor, game_to_record
+
+MOVETEXTS = [
+    # Comentario con evaluación después de una variante
+    "1. e4 (1. d4) {[%eval 0.3]} e5 {[%eval 0.2] [%clk 0:59:30]} 2. Nf3 *",
+    "1. e4 {[%eval 0.1]} (1. d4 {[%eval 9]} d5 (1... Nf6)) e5 {[%eval 0.2]} (1... c5 {x}) 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# *",
+    # Desambiguación de más, enroque con ceros y jaque sin marcar
+    "1. e4 e5 2. Ngf3 Nbc6 3. Bc4 Nf6 4. 0-0 Bc5 5. Bxf7 Kxf7 *",
+    # Desambiguación necesaria
+    "1. Nf3 Nf6 2. Nc3 Nc6 3. d4 d5 4. Nd2 Ne4 5. Ndb1 *"
+]
+
+
+@pytest.mark.parametrize("movetext", MOVETEXTS)
+def test_visitor_matches_game_tree(movetext):
+    visitor_record = chess.pgn.read_game(io.StringIO(movetext), Visitor=GameRecordVisitor)
+    tree_record = game_to_record(chess.pgn.read_game(io.StringIO(movetext)), 0)
+    assert visitor_record["Moves"] == tree_record["Moves"]
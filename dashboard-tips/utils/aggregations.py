@@ -0,0 +1,152 @@
+import pandas as pd
+
+from utils.standings import STANDINGS_COLUMNS, WHITE_POINTS, rank_standings
+
+OPENING_STATS_COLUMNS = ["ECO", "Tooltip", "White Wins", "Black Wins", "Draws"]
+ELO_RESULT_COLUMNS = ["White_Elo", "Black_Elo", "Result", "Games"]
+
+
+def _count_result(result):
+    return {"$sum": {"$cond": [{"$eq": ["$Result", result]}, 1, 0]}}
+
+
+def _count_if(condition):
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+def _sum_if(condition, value):
+    return {"$sum": {"$cond": [condition, value, 0]}}
+
+
+def games_stages(tournament_id):
+    """Partidas del torneo con el nombre y el ELO de sus jugadores.
+
+    Igual que load_data_by_tournament, solo cuenta las partidas cuyos dos jugadores
+    están en Players, y de cada FideId toma el primer jugador encontrado.
+    """
+    return [
+        {"$match": {"TournamentId": tournament_id}},
+        {"$lookup": {"from": "Players", "localField": "White", "foreignField": "FideId", "as": "WhitePlayer"}},
+        {"$lookup": {"from": "Players", "localField": "Black", "foreignField": "FideId", "as": "BlackPlayer"}},
+        {"$match": {"WhitePlayer.0": {"$exists": True}, "BlackPlayer.0": {"$exists": True}}},
+        {"$project": {
+            "Result": 1,
+            "ECO": 1,
+            "OpeningName": 1,
+            "White_Player": {"$arrayElemAt": ["$WhitePlayer.Name", 0]},
+            "Black_Player": {"$arrayElemAt": ["$BlackPlayer.Name", 0]},
+            "White_Elo": {"$arrayElemAt": ["$WhitePlayer.Elo", 0]},
+            "Black_Elo": {"$arrayElemAt": ["$BlackPlayer.Elo", 0]}
+        }}
+    ]
+
+
+def openings_pipeline(tournament_id, top_openings=10):
+    """Resultados de las aperturas más jugadas; los empates se deshacen por el _id más pequeño."""
+    return games_stages(tournament_id) + [
+        {"$group": {"_id": "$OpeningName", "ECO": {"$first": "$ECO"}, "Games": {"$sum": 1},
+                    "First": {"$min": "$_id"}, "White Wins": _count_result("1-0"),
+                    "Black Wins": _count_result("0-1"), "Draws": _count_result("1/2-1/2")}},
+        {"$sort": {"Games": -1, "First": 1}},
+        {"$limit": top_openings}
+    ]
+
+
+def standings_pipeline(tournament_id):
+    """Totales de cada jugador, con un documento por jugador.
+
+    Cada partida se desdobla en una fila por jugador y se agrupa primero por jugador y rival
+    y después por jugador. Opponents guarda las partidas y los puntos contra cada rival, que
+    es lo único que necesitan los desempates (ver rank_standings).
+    """
+    white_points = {"$switch": {
+        "branches": [{"case": {"$eq": ["$Result", result]}, "then": points} for result, points in WHITE_POINTS.items()],
+        "default": None
+    }}
+    played = {"$ne": ["$Points", None]}
+    white = "$White"
+    black = {"$eq": ["$White", False]}
+    counters = {
+        "Points": {"$sum": {"$ifNull": ["$Points", 0]}},
+        "Games": _count_if(played),
+        "Wins": _count_if({"$eq": ["$Points", 1]}),
+        "Draws": _count_if({"$eq": ["$Points", 0.5]}),
+        "Losses": _count_if({"$eq": ["$Points", 0]}),
+        "White_Points": _sum_if(white, {"$ifNull": ["$Points", 0]}),
+        "White_Wins": _count_if({"$and": [white, {"$eq": ["$Points", 1]}]}),
+        "White_Draws": _count_if({"$and": [white, {"$eq": ["$Points", 0.5]}]}),
+        "White_Losses": _count_if({"$and": [white, {"$eq": ["$Points", 0]}]}),
+        "Black_Points": _sum_if(black, {"$ifNull": ["$Points", 0]}),
+        "Black_Wins": _count_if({"$and": [black, {"$eq": ["$Points", 1]}]}),
+        "Black_Draws": _count_if({"$and": [black, {"$eq": ["$Points", 0.5]}]}),
+        "Black_Losses": _count_if({"$and": [black, {"$eq": ["$Points", 0]}]}),
+        "Black_Games": _count_if({"$and": [black, played]})
+    }
+
+    return games_stages(tournament_id) + [
+        {"$project": {"_id": 0, "Sides": {"$map": {"input": [True, False], "as": "white", "in": {
+            "Player": {"$cond": ["$$white", "$White_Player", "$Black_Player"]},
+            "Opponent": {"$cond": ["$$white", "$Black_Player", "$White_Player"]},
+            "White": "$$white",
+            "Points": {"$cond": ["$$white", white_points, {"$subtract": [1, white_points]}]}
+        }}}}},
+        {"$unwind": "$Sides"},
+        {"$replaceRoot": {"newRoot": "$Sides"}},
+        {"$group": {"_id": {"Player": "$Player", "Opponent": "$Opponent"}, **counters}},
+        {"$group": {
+            "_id": "$_id.Player",
+            **{name: {"$sum": f"${name}"} for name in counters},
+            "Opponents": {"$push": {"Opponent": "$_id.Opponent", "Games": "$Games", "Points": "$Points"}}
+        }}
+    ]
+
+
+def elo_results_pipeline(tournament_id):
+    """Número de partidas de cada combinación de ELO de blancas, ELO de negras y resultado."""
+    return games_stages(tournament_id) + [
+        {"$group": {"_id": {"White_Elo": "$White_Elo", "Black_Elo": "$Black_Elo", "Result": "$Result"},
+                    "Games": {"$sum": 1}}},
+        {"$project": {"_id": 0, "White_Elo": "$_id.White_Elo", "Black_Elo": "$_id.Black_Elo",
+                      "Result": "$_id.Result", "Games": 1}},
+        {"$sort": {"White_Elo": 1, "Black_Elo": 1, "Result": 1}}
+    ]
+
+
+def elo_result_counts(details_df):
+    """Lo mismo que elo_results_pipeline, calculado en pandas a partir de details_df."""
+    counts = details_df.groupby(["White_Elo", "Black_Elo", "Result"], observed=True).size()
+    return counts.reset_index(name="Games")
+
+
+def general_stats(db, tournament_id, top_openings=10):
+    """Devuelve las tablas de la pestaña General calculadas en el servidor.
+
+    El resultado es un diccionario con "standings" (como compute_standings), "openings"
+    (aperturas más jugadas, como opening_results_stats) y "elo_results" (como elo_result_counts).
+    Cada tabla sale de su propia agregación y crece con el número de jugadores o de
+    combinaciones de ELO, no con el de partidas. Devuelve None si el torneo no tiene partidas
+    con jugadores conocidos.
+    """
+    players = list(db["Details"].aggregate(standings_pipeline(tournament_id)))
+    if not players:
+        return None
+
+    totals = pd.DataFrame(players).rename(columns={"_id": "Player"}).set_index("Player")
+    opponents = pd.DataFrame(
+        [{"Player": player["_id"], **opponent} for player in players for opponent in player["Opponents"]],
+        columns=["Player", "Opponent", "Games", "Points"]
+    )
+    standings = rank_standings(totals[[col for col in STANDINGS_COLUMNS if col in totals.columns]], opponents)
+
+    openings = pd.DataFrame(list(db["Details"].aggregate(openings_pipeline(tournament_id, top_openings))),
+                            columns=["_id", "ECO", "White Wins", "Black Wins", "Draws"])
+    openings["Tooltip"] = openings["ECO"].astype(str) + " - " + openings["_id"].astype(str)
+
+    elo_results = pd.DataFrame(list(db["Details"].aggregate(elo_results_pipeline(tournament_id))),
+                               columns=ELO_RESULT_COLUMNS)
+
+    return {
+        "standings": standings,
+        "openings": openings[OPENING_STATS_COLUMNS],
+        "elo_results": elo_results
+    }
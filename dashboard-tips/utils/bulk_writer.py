@@ -0,0 +1,73 @@
+import time
+from collections import defaultdict
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+class BulkWriter:
+    """Acumula documentos por colección y los escribe en lotes no ordenados.
+
+    Los documentos añadidos con add se insertan con insert_many; los añadidos con upsert
+    solo se crean si no existe ya uno que cumpla el filtro.
+    """
+
+    def __init__(self, db, batch_size=1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = defaultdict(list)
+        self.upserts = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.errors = []
+        self.seconds = 0.0
+
+    def add(self, collection, document):
+        self.buffers[collection].append(document)
+
+    def add_many(self, collection, documents):
+        self.buffers[collection].extend(documents)
+
+    def upsert(self, collection, filter, document):
+        self.upserts[collection].append(UpdateOne(filter, {"$setOnInsert": document}, upsert=True))
+
+    def pending(self):
+        return sum(len(docs) for docs in self.buffers.values()) + sum(len(ops) for ops in self.upserts.values())
+
+    def is_full(self):
+        return self.pending() >= self.batch_size
+
+    def flush(self):
+        started = time.perf_counter()
+        # Las colecciones se escriben en el orden en que se añadieron por primera vez
+        for collection, docs in self.buffers.items():
+            if not docs:
+                continue
+            try:
+                result = self.db[collection].insert_many(docs, ordered=False)
+                self.counts[collection] += len(result.inserted_ids)
+            except BulkWriteError as e:
+                self.counts[collection] += e.details.get("nInserted", 0)
+                self._record_errors(collection, e)
+
+        for collection, operations in self.upserts.items():
+            if not operations:
+                continue
+            try:
+                result = self.db[collection].bulk_write(operations, ordered=False)
+                self.counts[collection] += result.upserted_count
+            except BulkWriteError as e:
+                self.counts[collection] += e.details.get("nUpserted", 0)
+                self._record_errors(collection, e)
+
+        self.buffers.clear()
+        self.upserts.clear()
+        self.seconds += time.perf_counter() - started
+
+    def _record_errors(self, collection, error):
+        self.errors.extend(
+            {"collection": collection, "code": err.get("code"), "message": err.get("errmsg")}
+            for err in error.details.get("writeErrors", [])
+        )
+
+    def summary(self):
+        return dict(self.counts)
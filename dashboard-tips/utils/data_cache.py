@@ -0,0 +1,103 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    """Tamaño aproximado en bytes de los DataFrames y contenedores que se guardan en la caché."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class DataCache:
+    """Caché compartida por todas las sesiones del proceso con los datos ya cargados de cada torneo.
+
+    Las entradas se identifican por (torneo, versión de datos, nombre). Cuando una importación
+    confirma un lote, la versión del torneo cambia y las entradas anteriores se descartan al
+    guardar la nueva o, antes, cuando el registro de torneos detecta el cambio e invalida el torneo.
+    Los valores se comparten entre sesiones, así que no deben modificarse.
+    """
+
+    def __init__(self, max_bytes=512 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tournament_id, version, name, loader):
+        """Devuelve el valor guardado o lo carga con loader, una sola vez aunque lo pidan varias sesiones."""
+        key = (tournament_id, version, name)
+        with self.lock:
+            if key in self.entries:
+                return self._hit(key)
+            key_lock = self.loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self.lock:
+                if key in self.entries:
+                    return self._hit(key)
+                self.misses += 1
+
+            try:
+                value = loader()
+                self._store(key, value, estimate_size(value))
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+        return value
+
+    def invalidate(self, tournament_id):
+        """Descarta todas las entradas del torneo para que dejen de ocupar memoria."""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == tournament_id]:
+                self._remove(key)
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "evictions": self.evictions
+            }
+
+    def _hit(self, key):
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+
+    def _store(self, key, value, size):
+        tournament_id, version, _ = key
+        with self.lock:
+            # Las versiones antiguas del mismo torneo ya no se volverán a pedir
+            for old_key in [k for k in self.entries if k[0] == tournament_id and k[1] != version]:
+                self._remove(old_key)
+
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size = self.entries.pop(key)
+        self.bytes -= size
+
+
+tournament_cache = DataCache()
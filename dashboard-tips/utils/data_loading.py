@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+from utils.game_moves import explode_games, game_projection
+
+# Campos de Moves que usan las gráficas de una partida y las estadísticas del torneo
+GAME_MOVE_FIELDS = {"_id": 0, "Round": 1, "Move Number": 1, "Move": 1, "Color": 1,
+                    "Evaluation": 1, "Time (seconds)": 1, "To": 1, "Piece": 1}
+SQUARE_FIELDS = {"_id": 0, "Move": 1, "Color": 1, "To": 1, "Piece": 1}
+TOURNAMENT_EVAL_FIELDS = {"_id": 0, "GameId": 1, "Round": 1, "Move Number": 1, "Color": 1, "Evaluation": 1}
+# Campos de Details y Players que no usa el panel y no se llegan a traer de MongoDB
+DETAILS_FIELDS = {"TournamentId": 0, "Event": 0, "Fingerprint": 0, "ImportJobId": 0, "GameIndex": 0}
+PLAYERS_FIELDS = {"_id": 0, "FideId": 1, "Name": 1, "Elo": 1}
+
+# Tipos compactos de las columnas cargadas; las que no aparecen se dejan como llegan
+DETAILS_TYPES = {"Round": "category", "White_Player": "category", "Black_Player": "category", "ECO": "category",
+                 "OpeningName": "category", "Result": "category", "White_Elo": "int16", "Black_Elo": "int16"}
+PLAYERS_TYPES = {"Name": "category", "Elo": "int16"}
+MOVES_TYPES = {"GameId": "category", "Round": "category", "Color": "category", "Move Number": "int16",
+               "Evaluation": "float32", "Depth": "int8", "Time (seconds)": "int32", "From": "int8", "To": "int8",
+               "Piece": "int8"}
+# Los dos jugadores comparten categorías para que concatenarlos siga siendo una categoría
+SHARED_CATEGORIES = {"White_Player": "Players", "Black_Player": "Players"}
+
+
+def typed_frame(df, types):
+    """Copia de df con los tipos compactos de types; los enteros con huecos pasan a enteros con nulos."""
+    df = df.copy()
+    shared = {}
+    for column, group in SHARED_CATEGORIES.items():
+        if column in df and column in types:
+            shared.setdefault(group, set()).update(df[column].dropna())
+
+    for column, dtype in types.items():
+        if column not in df:
+            continue
+        if dtype == "category":
+            group = SHARED_CATEGORIES.get(column)
+            categories = sorted(shared[group]) if group else sorted(df[column].dropna().unique())
+            df[column] = pd.Categorical(df[column], categories=categories)
+        elif dtype.startswith("int"):
+            values = pd.to_numeric(df[column], errors="coerce")
+            df[column] = values.astype(dtype.capitalize() if values.isna().any() else dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def load_data_by_tournament(db, tournament_id, typed=True):
+    """Carga las partidas y los jugadores de un torneo con tipos compactos; las jugadas se cargan aparte.
+
+    Con typed=False las columnas se dejan con los tipos que da pandas (para comparar la memoria).
+    """
+
+    details_raw = list(db["Details"].find({"TournamentId": tournament_id}, DETAILS_FIELDS))
+    if not details_raw:
+        return pd.DataFrame(), pd.DataFrame()
+
+    details_df = pd.DataFrame(details_raw)
+
+    fide_ids = pd.unique(details_df[["White", "Black"]].values.ravel())
+
+    players_df = pd.DataFrame(list(db["Players"].find({"FideId": {"$in": list(fide_ids)}}, PLAYERS_FIELDS)))
+    if players_df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    players_df = players_df.drop_duplicates(subset=["FideId"])
+
+    details_df = details_df.merge(players_df[['FideId', 'Name', 'Elo']], left_on="White", right_on="FideId")
+    details_df = details_df.rename(columns={"Name": "White_Player", "Elo": "White_Elo", "White": "White_Fide_ID"}).drop(columns=["FideId"])
+
+    details_df = details_df.merge(players_df[['FideId', 'Name', 'Elo']], left_on="Black", right_on="FideId")
+    details_df = details_df.rename(columns={"Name": "Black_Player", "Elo": "Black_Elo", "Black": "Black_Fide_ID"}).drop(columns=["FideId"])
+
+    if not typed:
+        return details_df, players_df
+    return typed_frame(details_df, DETAILS_TYPES), typed_frame(players_df, PLAYERS_TYPES)
+
+
+def build_game_index(details_df):
+    """Relaciona la ronda que muestra el selector de partidas con la posición de la partida en details_df."""
+    return dict(zip(details_df["Round"].astype(str).str.strip(), range(len(details_df))))
+
+
+def load_game_moves(db, game_id):
+    """Carga solo las jugadas de una partida, ordenadas por número de jugada y con blancas primero."""
+    game = db["GameMoves"].find_one({"_id": game_id}, game_projection(GAME_MOVE_FIELDS))
+    if game is not None:
+        return explode_games([game], GAME_MOVE_FIELDS)
+
+    moves_df = pd.DataFrame(list(db["Moves"].find({"GameId": game_id}, GAME_MOVE_FIELDS)))
+    if moves_df.empty:
+        return moves_df
+
+    order = np.lexsort((moves_df["Color"].map({"White": 0, "Black": 1}).values, moves_df["Move Number"].values))
+    return moves_df.iloc[order].reset_index(drop=True)
+
+
+def load_tournament_moves(db, tournament_id, fields):
+    """Jugadas de un torneo con los campos de la proyección fields, estén guardadas en Moves o en GameMoves."""
+    frames = [
+        pd.DataFrame(list(db["Moves"].find({"TournamentId": tournament_id}, fields))),
+        explode_games(db["GameMoves"].find({"TournamentId": tournament_id}, game_projection(fields)), fields)
+    ]
+    frames = [frame for frame in frames if not frame.empty]
+    if len(frames) < 2:
+        return frames[0] if frames else pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_tournament_evaluations(db, tournament_id, typed=True):
+    """Carga las evaluaciones de todas las jugadas de un torneo, sin el resto de campos.
+
+    GameId y Color se guardan como categorías para agrupar y cruzar sin comparar cada ObjectId.
+    """
+    moves_df = load_tournament_moves(db, tournament_id, TOURNAMENT_EVAL_FIELDS)
+    if moves_df.empty or not typed:
+        return moves_df
+    return typed_frame(moves_df, MOVES_TYPES)
+
+
+def load_player_moves(db, fide_id, tournament_id=None):
+    """Carga las jugadas hechas por un jugador en un torneo o, sin tournament_id, en todos.
+
+    Solo se traen los campos de geometría de la jugada y solo las del color del jugador en cada partida.
+    """
+    query = {"$or": [{"White": fide_id}, {"Black": fide_id}]}
+    if tournament_id is not None:
+        query["TournamentId"] = tournament_id
+
+    games = {"White": [], "Black": []}
+    for doc in db["Details"].find(query, {"White": 1}):
+        games["White" if doc["White"] == fide_id else "Black"].append(doc["_id"])
+    if not games["White"] and not games["Black"]:
+        return pd.DataFrame()
+
+    moves_query = {"$or": [{"GameId": {"$in": game_ids}, "Color": color} for color, game_ids in games.items() if game_ids]}
+    moves_df = pd.DataFrame(list(db["Moves"].find(moves_query, SQUARE_FIELDS)))
+
+    # Las partidas guardadas en GameMoves se expanden enteras y se quedan las jugadas del color del jugador
+    game_fields = {"GameId": 1, **SQUARE_FIELDS}
+    game_docs = db["GameMoves"].find({"_id": {"$in": games["White"] + games["Black"]}}, game_projection(game_fields))
+    game_moves_df = explode_games(game_docs, game_fields)
+    if not game_moves_df.empty:
+        played = ((game_moves_df["GameId"].isin(games["White"]) & (game_moves_df["Color"] == "White")) |
+                  (game_moves_df["GameId"].isin(games["Black"]) & (game_moves_df["Color"] == "Black")))
+        game_moves_df = game_moves_df.loc[played].drop(columns="GameId")
+        moves_df = pd.concat([moves_df, game_moves_df], ignore_index=True) if not moves_df.empty else game_moves_df.reset_index(drop=True)
+
+    return typed_frame(moves_df, MOVES_TYPES) if not moves_df.empty else moves_df
@@ -0,0 +1,177 @@
+import atexit
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import chess.engine
+
+ENGINE_PATH = os.environ.get("STOCKFISH_PATH", "/app/evaluator/stockfish/stockfish")
+ENGINE_POOL_SIZE = int(os.environ.get("ENGINE_POOL_SIZE", 2))
+ENGINE_OPTIONS = {
+    "Threads": int(os.environ.get("ENGINE_THREADS", 1)),
+    "Hash": int(os.environ.get("ENGINE_HASH", 64))
+}
+
+
+class EngineManager:
+    """Procesos UCI que se mantienen abiertos y se prestan de uno en uno a los hilos de análisis.
+
+    Como mucho hay size procesos; se arrancan la primera vez que hacen falta y se reutilizan en las
+    importaciones siguientes. Los préstamos se atienden por orden de llegada, así que varias
+    importaciones simultáneas se reparten los motores partida a partida. Antes de cada préstamo
+    se comprueba con un ping que el proceso responde, y un proceso que falla se sustituye por otro.
+    """
+
+    def __init__(self, engine_path, size=1, options=None):
+        self.engine_path = engine_path
+        self.size = size
+        self.options = options or {}
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.waiting = deque()
+        self.running = 0
+        self.closed = False
+        self.leases = 0
+        self.restarts = 0
+
+    def _start(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        try:
+            # Solo se configuran las opciones que el motor anuncia
+            engine.configure({name: value for name, value in self.options.items() if name in engine.options})
+        except chess.engine.EngineError:
+            self._quit(engine)
+            raise
+        return engine
+
+    @staticmethod
+    def _quit(engine):
+        try:
+            engine.quit()
+        except (chess.engine.EngineError, chess.engine.EngineTerminatedError, TimeoutError):
+            engine.close()
+
+    def _healthy(self, engine):
+        try:
+            engine.ping()
+            return True
+        except (chess.engine.EngineError, chess.engine.EngineTerminatedError, TimeoutError):
+            return False
+
+    def _acquire(self):
+        ticket = object()
+        with self.condition:
+            self.waiting.append(ticket)
+            try:
+                while not self.closed and not (self.waiting[0] is ticket and (self.idle or self.running < self.size)):
+                    self.condition.wait()
+                if self.closed:
+                    raise RuntimeError("El gestor de motores está cerrado.")
+                engine = self.idle.popleft() if self.idle else None
+                if engine is None:
+                    self.running += 1
+                self.leases += 1
+            finally:
+                self.waiting.remove(ticket)
+                self.condition.notify_all()
+
+        if engine is not None and self._healthy(engine):
+            return engine
+
+        try:
+            if engine is not None:
+                self._quit(engine)
+                with self.condition:
+                    self.restarts += 1
+            return self._start()
+        except BaseException:
+            with self.condition:
+                self.running -= 1
+                self.condition.notify_all()
+            raise
+
+    def _release(self, engine, healthy):
+        with self.condition:
+            if healthy and not self.closed:
+                self.idle.append(engine)
+                self.condition.notify_all()
+                return
+            self.running -= 1
+            if not self.closed:
+                self.restarts += 1
+            self.condition.notify_all()
+        self._quit(engine)
+
+    @contextmanager
+    def lease(self):
+        """Presta un motor listo para analizar; si el proceso se cae durante el préstamo, se descarta."""
+        engine = self._acquire()
+        healthy = True
+        try:
+            yield engine
+        except chess.engine.EngineTerminatedError:
+            healthy = False
+            raise
+        finally:
+            self._release(engine, healthy)
+
+    def identity(self, engine):
+        """Nombre del motor y opciones aplicadas; distingue en la caché las evaluaciones de cada configuración."""
+        options = " ".join(f"{name}={value}" for name, value in sorted(self.options.items()) if name in engine.options)
+        return f"{engine.id.get('name', self.engine_path)} {options}".strip()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            idle, self.idle = list(self.idle), deque()
+            self.running -= len(idle)
+            self.condition.notify_all()
+        for engine in idle:
+            self._quit(engine)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "size": self.size,
+                "running": self.running,
+                "idle": len(self.idle),
+                "waiting": len(self.waiting),
+                "leases": self.leases,
+                "restarts": self.restarts
+            }
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_engine_manager(engine_path=None, size=None, options=None):
+    """Gestor de motores compartido por todo el proceso, uno por ruta de motor.
+
+    size y options solo se usan la primera vez; por defecto salen de ENGINE_POOL_SIZE,
+    ENGINE_THREADS y ENGINE_HASH.
+    """
+    engine_path = engine_path or ENGINE_PATH
+    with _managers_lock:
+        manager = _managers.get(engine_path)
+        if manager is None or manager.closed:
+            manager = EngineManager(engine_path, size or ENGINE_POOL_SIZE, options or ENGINE_OPTIONS)
+            _managers[engine_path] = manager
+        return manager
+
+
+def close_engine_managers():
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
+
+
+# python-chess atiende cada motor desde un hilo que no es daemon: al salir hay que cerrar los motores
+# antes de que el intérprete espere a esos hilos, y atexit llega demasiado tarde
+if hasattr(threading, "_register_atexit"):
+    threading._register_atexit(close_engine_managers)
+else:
+    atexit.register(close_engine_managers)
@@ -0,0 +1,140 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import chess.polyglot
+from pymongo import ASCENDING, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+def position_key(board):
+    """Hash Zobrist del tablero como entero con signo de 64 bits (long de BSON)."""
+    key = chess.polyglot.zobrist_hash(board)
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+def cache_entry(score, depth, nodes=None):
+    """Entrada de la caché con el resultado de engine.analyse; score es un PovScore o Score desde el punto de vista de blancas."""
+    return {"Score": score.score(), "Mate": score.mate(), "Depth": depth, "Nodes": nodes}
+
+
+def score_to_evaluation(entry):
+    """Convierte una entrada de la caché a la evaluación en peones que se guarda en Moves."""
+    if entry["Mate"] is not None:
+        return 100 if entry["Mate"] > 0 else -100
+    return entry["Score"] / 100.0
+
+
+class EvalCache:
+    """Caché persistente de evaluaciones del motor indexada por posición.
+
+    Mantiene en memoria las entradas más recientes (LRU) y persiste el resto en MongoDB.
+    Una entrada sirve para cualquier profundidad menor o igual a la almacenada. El _id de cada
+    entrada es {"Engine": engine, "Position": hash Zobrist}: las evaluaciones de otro motor, o del
+    mismo con otras opciones, no se reutilizan.
+
+    Las entradas nuevas solo se escriben con flush, al acabar la importación: mientras tanto
+    get_many solo ve las que ya existían, y el resultado no depende de qué partida termine antes.
+    """
+
+    def __init__(self, collection, engine, max_entries=1_000_000, memory_entries=100_000):
+        self.collection = collection
+        self.engine = engine
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.pending = {}
+        self.touched = set()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys, depth):
+        """Devuelve {clave: entrada} de las posiciones evaluadas al menos a la profundidad pedida."""
+        keys = list(dict.fromkeys(keys))
+        ids = {key: {"Engine": self.engine, "Position": key} for key in keys}
+        found = {}
+        missing = []
+        with self.lock:
+            for key in keys:
+                entry = self.memory.get(key)
+                if entry is not None and entry["Depth"] >= depth:
+                    self.memory.move_to_end(key)
+                    found[key] = entry
+                else:
+                    missing.append(key)
+
+        if missing:
+            stored = list(self.collection.find(
+                {"_id": {"$in": [ids[key] for key in missing]}, "Depth": {"$gte": depth}},
+                {"Score": 1, "Mate": 1, "Depth": 1, "Nodes": 1}
+            ))
+            with self.lock:
+                for doc in stored:
+                    key = doc["_id"]["Position"]
+                    found[key] = doc
+                    self._remember(key, doc)
+
+        with self.lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self.touched.update(found)
+
+        return found
+
+    def put(self, key, entry):
+        """Apunta una entrada para el próximo flush; a igual profundidad se queda la primera."""
+        with self.lock:
+            pending = self.pending.get(key)
+            if pending is None or pending["Depth"] < entry["Depth"]:
+                self.pending[key] = entry
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            touched, self.touched = self.touched, set()
+
+        now = datetime.now(timezone.utc)
+        operations = [
+            # Solo se sustituye una entrada existente si la nueva es más profunda;
+            # si ya hay una más profunda el upsert falla por clave duplicada y se ignora.
+            UpdateOne({"_id": {"Engine": self.engine, "Position": key}, "Depth": {"$lt": entry["Depth"]}},
+                      {"$set": {**entry, "LastUsed": now}}, upsert=True)
+            for key, entry in pending.items()
+        ]
+        touched -= pending.keys()
+        if touched:
+            operations.append(UpdateMany({"_id": {"$in": [{"Engine": self.engine, "Position": key} for key in touched]}},
+                                         {"$set": {"LastUsed": now}}))
+
+        if operations:
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+
+        self.evict()
+
+    def evict(self):
+        """Elimina las entradas usadas hace más tiempo cuando la colección supera max_entries."""
+        excess = self.collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return 0
+        oldest = [doc["_id"] for doc in self.collection.find({}, {"_id": 1}).sort("LastUsed", ASCENDING).limit(excess)]
+        return self.collection.delete_many({"_id": {"$in": oldest}}).deleted_count
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self.memory)
+        }
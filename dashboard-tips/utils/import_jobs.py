@@ -0,0 +1,74 @@
+import os
+from datetime import datetime, timezone
+
+from pymongo import DESCENDING
+
+
+class ImportJob:
+    """Punto de control de una importación guardado en la colección ImportJobs.
+
+    El punto de control hace de confirmación de cada lote: al reanudar, cualquier partida
+    escrita después del último punto de control se elimina y se vuelve a importar.
+    """
+
+    def __init__(self, db, job):
+        self.db = db
+        self.id = job["_id"]
+        self.tournament_id = job["TournamentId"]
+        self.offset = job.get("Offset", 0)
+        self.game_index = job.get("GameIndex", 0)
+
+    @classmethod
+    def start(cls, db, tournament_id, pgn_file, resume=False):
+        pgn_file = os.path.abspath(pgn_file)
+        now = datetime.now(timezone.utc)
+
+        if resume:
+            job = db.ImportJobs.find_one(
+                {"TournamentId": tournament_id, "PgnFile": pgn_file, "Status": {"$ne": "completed"}},
+                sort=[("UpdatedAt", DESCENDING)]
+            )
+            if job is not None:
+                db.ImportJobs.update_one({"_id": job["_id"]}, {"$set": {"Status": "running", "UpdatedAt": now}})
+                import_job = cls(db, job)
+                import_job.rollback()
+                return import_job
+
+        job = {
+            "TournamentId": tournament_id,
+            "PgnFile": pgn_file,
+            "Status": "running",
+            "Offset": 0,
+            "GameIndex": 0,
+            "StartedAt": now,
+            "UpdatedAt": now
+        }
+        job["_id"] = db.ImportJobs.insert_one(job).inserted_id
+        return cls(db, job)
+
+    def rollback(self):
+        """Elimina las partidas de este trabajo escritas después del último punto de control."""
+        uncommitted = [
+            doc["_id"]
+            for doc in self.db.Details.find({"ImportJobId": self.id, "GameIndex": {"$gt": self.game_index}}, {"_id": 1})
+        ]
+        if uncommitted:
+            self.db.Moves.delete_many({"GameId": {"$in": uncommitted}})
+            self.db.GameMoves.delete_many({"_id": {"$in": uncommitted}})
+            self.db.Details.delete_many({"_id": {"$in": uncommitted}})
+            self.db.Tournaments.update_one({"_id": self.tournament_id}, {"$inc": {"DataVersion": 1}})
+        return len(uncommitted)
+
+    def checkpoint(self, game_index, offset):
+        self.game_index = game_index
+        self.offset = offset
+        self.db.ImportJobs.update_one(
+            {"_id": self.id},
+            {"$set": {"GameIndex": game_index, "Offset": offset, "UpdatedAt": datetime.now(timezone.utc)}}
+        )
+
+    def finish(self, status):
+        self.db.ImportJobs.update_one(
+            {"_id": self.id},
+            {"$set": {"Status": status, "UpdatedAt": datetime.now(timezone.utc)}}
+        )
@@ -0,0 +1,36 @@
+from pymongo import ASCENDING, DESCENDING
+
+# Índices de la base de datos. Los crean python/create_collections.py al montar la base de datos
+# y el importador antes de cada importación; los únicos hacen idempotente la importación.
+INDEXES = {
+    "Tournaments": [
+        ([("Name", ASCENDING)], {"unique": True})
+    ],
+    "Details": [
+        ([("TournamentId", ASCENDING), ("Round", ASCENDING)], {}),
+        ([("White", ASCENDING)], {}),
+        ([("Black", ASCENDING)], {}),
+        ([("TournamentId", ASCENDING), ("Fingerprint", ASCENDING)],
+         {"unique": True, "partialFilterExpression": {"Fingerprint": {"$exists": True}}})
+    ],
+    "Players": [
+        ([("FideId", ASCENDING)], {}),
+        ([("TournamentId", ASCENDING), ("FideId", ASCENDING), ("Name", ASCENDING), ("Elo", ASCENDING)], {"unique": True})
+    ],
+    "Openings": [
+        ([("ECO", ASCENDING)], {"unique": True})
+    ],
+    "Moves": [
+        ([("TournamentId", ASCENDING), ("Round", ASCENDING), ("Move Number", ASCENDING)], {}),
+        ([("GameId", ASCENDING), ("Move Number", ASCENDING), ("Color", ASCENDING)], {"unique": True})
+    ],
+    "GameMoves": [
+        ([("TournamentId", ASCENDING)], {})
+    ],
+    "EvalCache": [
+        ([("LastUsed", ASCENDING)], {})
+    ],
+    "ImportJobs": [
+        ([("TournamentId", ASCENDING), ("PgnFile", ASCENDING), ("UpdatedAt", DESCENDING)], {})
+    ]
+}
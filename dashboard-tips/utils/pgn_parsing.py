@@ -0,0 +1,286 @@
+import bz2
+import gzip
+import hashlib
+import io
+import lzma
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess.pgn
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GAME_START_PATTERN = re.compile(rb"^\[Event ", re.MULTILINE)
+# La firma del archivo manda; la extensión solo se mira si no hay firma conocida
+COMPRESSION_MAGIC = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz", b"\x28\xb5\x2f\xfd": "zstd"}
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+READ_SIZE = 1 << 20
+EVAL_PATTERN = re.compile(r'\[%eval\s*(-?[\d.]+)\]')
+CLOCK_PATTERN = re.compile(r'\[%clk\s*([\d:]+)\]')
+FINGERPRINT_HEADERS = ("Event", "Site", "Date", "UTCDate", "UTCTime", "Round", "White", "Black",
+                       "WhiteFideId", "BlackFideId", "Result")
+# Tokens que ya están en SAN canónico salvo por el sufijo de jaque, que el parser de python-chess descarta.
+# Las jugadas de pieza con desambiguación no entran: el autor del PGN puede desambiguar de más (Ngf3)
+CANONICAL_SAN_PATTERN = re.compile(r'^(?:[NBRQK]x?[a-h][1-8]|[a-h](?:x[a-h])?[1-8](?:=[NBRQ])?|O-O(?:-O)?)$')
+
+
+def extract_eval_and_time(comment):
+    eval_match = EVAL_PATTERN.search(comment)
+    time_match = CLOCK_PATTERN.search(comment)
+
+    evaluation = float(eval_match.group(1)) if eval_match else None
+    time = time_match.group(1) if time_match else ""
+
+    return evaluation, time
+
+
+def game_fingerprint(record):
+    """Huella SHA-256 de la partida a partir de sus cabeceras principales y la secuencia de jugadas."""
+    headers = record["Headers"]
+    content = "\n".join(f"{name}={headers.get(name, '')}" for name in FINGERPRINT_HEADERS)
+    content += "\n" + record["Fen"] + "\n" + " ".join(uci for uci, _, _, _ in record["Moves"])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def game_to_record(game, offset):
+    """Reduce una partida a un registro serializable con lo que se guarda en MongoDB.
+
+    Cada jugada es una tupla (uci, san, evaluación del PGN o None, reloj).
+    """
+    board = game.board()
+    fen = board.fen()
+    moves = []
+    for node in game.mainline():
+        evaluation, time = extract_eval_and_time(node.comment)
+        moves.append((node.move.uci(), board.san(node.move), evaluation, time))
+        board.push(node.move)
+
+    return {"Offset": offset, "Headers": dict(game.headers), "Fen": fen, "Moves": moves}
+
+
+class GameRecordVisitor(chess.pgn.BaseVisitor):
+    """Genera el mismo registro que game_to_record sin construir el árbol de GameNode.
+
+    Solo sigue la línea principal: las variantes se saltan sin parsearlas y el SAN se toma
+    del propio PGN (añadiendo + o #) en lugar de recalcularlo con board.san.
+    """
+
+    def __init__(self, offset=0):
+        self.offset = offset
+
+    def begin_game(self):
+        self.headers = {}
+        self.fen = None
+        self.moves = []
+        self.errors = []
+        self.san = None
+        self.current = None
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def visit_board(self, board):
+        if self.fen is None:
+            self.fen = board.fen()
+        elif self.current is not None and self.current[3] and board.is_check():
+            self.current[1] += "#" if board.is_checkmate() else "+"
+            self.current[3] = False
+
+    def begin_parse_san(self, board, san):
+        self.san = san.replace("0", "O") if san.startswith("0-0") else san
+
+    def visit_move(self, board, move):
+        self._close_move()
+        if CANONICAL_SAN_PATTERN.match(self.san):
+            self.current = [move.uci(), self.san, [], True]
+        else:
+            self.current = [move.uci(), board.san(move), [], False]
+
+    def visit_comment(self, comment):
+        # Como en GameBuilder, los comentarios que siguen a la jugada, también tras una variante, son suyos
+        if self.current is not None:
+            self.current[2].append(comment)
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def handle_error(self, error):
+        self.errors.append(error)
+
+    def end_game(self):
+        self._close_move()
+
+    def _close_move(self):
+        if self.current is None:
+            return
+        uci, san, comments, _ = self.current
+        evaluation, time = extract_eval_and_time(" ".join(comments))
+        self.moves.append((uci, san, evaluation, time))
+        self.current = None
+
+    def result(self):
+        return {"Offset": self.offset, "Headers": self.headers, "Fen": self.fen, "Moves": self.moves}
+
+
+def pgn_compression(pgn_file):
+    """Compresión del PGN ("gzip", "bz2", "xz" o "zstd"), o None si es texto sin comprimir."""
+    with open(pgn_file, "rb") as f:
+        head = f.read(6)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(pgn_file)[1].lower())
+
+
+def open_pgn(pgn_file):
+    """Abre el PGN en binario; si está comprimido, se descomprime sobre la marcha al leer."""
+    compression = pgn_compression(pgn_file)
+    if compression == "gzip":
+        return gzip.open(pgn_file, "rb")
+    if compression == "bz2":
+        return bz2.open(pgn_file, "rb")
+    if compression == "xz":
+        return lzma.open(pgn_file, "rb")
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Hace falta el paquete zstandard para leer archivos .zst.")
+        # Los .zst escritos en paralelo (pzstd, zstd -T) tienen varios frames seguidos
+        return zstandard.ZstdDecompressor().stream_reader(open(pgn_file, "rb"), read_across_frames=True, closefd=True)
+    return open(pgn_file, "rb")
+
+
+def scan_game_offsets(pgn_file):
+    """Devuelve los desplazamientos en bytes de cada línea que empieza por [Event."""
+    with open(pgn_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offsets = [match.start() for match in GAME_START_PATTERN.finditer(mm)]
+
+    # Lo que haya antes del primer [Event (BOM, partidas sin cabecera Event) se asigna al primer rango
+    if not offsets:
+        return [0]
+    offsets[0] = 0
+    return offsets
+
+
+def iter_game_chunks(pgn_file, games_per_task=64, start_offset=0, read_size=READ_SIZE):
+    """Recorre el PGN, comprimido o no, en bloques de hasta games_per_task partidas sin cargarlo entero.
+
+    Cada bloque es (offsets, data): data son los bytes de las partidas y offsets sus desplazamientos
+    en el texto descomprimido, con el mismo criterio que scan_game_offsets. En memoria solo están
+    el bloque en curso y lo leído del siguiente.
+    """
+    with open_pgn(pgn_file) as f:
+        buffer = b""
+        base = 0        # Desplazamiento de buffer[0] en el texto descomprimido
+        scanned = 0     # Hasta aquí ya se han buscado inicios de partida en buffer
+        starts = []
+        eof = False
+
+        while not eof:
+            data = f.read(read_size)
+            eof = not data
+            buffer += data
+
+            # Solo se buscan inicios en líneas completas: un [Event partido entre lecturas se busca en la siguiente
+            limit = len(buffer) if eof else buffer.rfind(b"\n", scanned) + 1
+            if limit > scanned:
+                for match in GAME_START_PATTERN.finditer(buffer, scanned, limit):
+                    # Lo que haya antes del primer [Event se asigna a la primera partida
+                    starts.append(base + match.start() if starts or base else 0)
+                scanned = limit
+            if eof and not starts and buffer:
+                starts.append(0)
+
+            # Se entregan las partidas completas: las que ya tienen detrás el inicio de la siguiente
+            done = 0
+            while len(starts) - done > games_per_task or (eof and done < len(starts)):
+                count = min(games_per_task, len(starts) - done - (0 if eof else 1))
+                end = starts[done + count] if done + count < len(starts) else base + len(buffer)
+                offsets = [offset for offset in starts[done:done + count] if offset >= start_offset]
+                if offsets:
+                    yield offsets, buffer[offsets[0] - base:end - base]
+                done += count
+
+            # Lo ya entregado se descarta de una vez, no bloque a bloque
+            if done:
+                cut = starts[done] - base if done < len(starts) else len(buffer)
+                buffer = buffer[cut:]
+                scanned -= cut
+                base += cut
+                starts = starts[done:]
+
+
+def parse_chunk(data, offsets):
+    """Parsea las partidas de data, que empiezan en los desplazamientos offsets (el primero, en data[0])."""
+    records = []
+    end = offsets[0] + len(data)
+    bounds = list(offsets[1:]) + [end]
+    for start, stop in zip(offsets, bounds):
+        chunk = data[start - offsets[0]:stop - offsets[0]]
+        handle = io.StringIO(chunk.decode("utf-8-sig", errors="replace"))
+        while True:
+            record = chess.pgn.read_game(handle, Visitor=lambda: GameRecordVisitor(start))
+            if record is None:
+                break
+            records.append(record)
+    return records
+
+
+def parse_games(pgn_file, offsets, end):
+    """Parsea las partidas del PGN sin comprimir que empiezan en offsets; la última termina en el byte end."""
+    with open(pgn_file, "rb") as f:
+        f.seek(offsets[0])
+        data = f.read(end - offsets[0])
+    return parse_chunk(data, offsets)
+
+
+def game_tasks(pgn_file, games_per_task=64, start_offset=0):
+    """Tareas de parseo (función, argumentos) del PGN a partir del byte start_offset.
+
+    Un PGN sin comprimir se indexa con mmap y cada tarea lee su tramo del archivo; uno comprimido
+    se descomprime una sola vez y cada tarea lleva sus bytes.
+    """
+    if pgn_compression(pgn_file) is not None:
+        for offsets, data in iter_game_chunks(pgn_file, games_per_task, start_offset):
+            yield parse_chunk, (data, offsets)
+        return
+
+    offsets = [offset for offset in scan_game_offsets(pgn_file) if offset >= start_offset]
+    size = os.path.getsize(pgn_file)
+    for i in range(0, len(offsets), games_per_task):
+        task_offsets = offsets[i:i + games_per_task]
+        end = offsets[i + games_per_task] if i + games_per_task < len(offsets) else size
+        yield parse_games, (pgn_file, task_offsets, end)
+
+
+def iter_game_records(pgn_file, parse_workers=1, games_per_task=64, start_offset=0):
+    """Recorre en orden los registros de partida del PGN a partir del byte start_offset.
+
+    Si parse_workers > 1 las partidas se parsean en paralelo en un pool de procesos. Los PGN
+    comprimidos (gzip, bz2, xz, zstd) se descomprimen sobre la marcha.
+    """
+    tasks = game_tasks(pgn_file, games_per_task, start_offset)
+
+    if parse_workers <= 1:
+        for function, args in tasks:
+            yield from function(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as executor:
+        # Ventana acotada de tareas en curso: se consumen en orden para mantener el orden del PGN
+        pending = deque()
+        for function, args in tasks:
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= 2 * parse_workers:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
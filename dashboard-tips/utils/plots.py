@@ -1,31 +1,53 @@
 import pandas as pd
 import numpy as np
-import re
+import plotly
 import plotly.graph_objects as go
 import plotly.io as pio
 import plotly.express as px
 from datetime import timedelta
+from pathlib import Path
 
+# plotly.js se sirve una sola vez como recurso estático desde el propio paquete de plotly
+PLOTLY_JS_DIR = Path(plotly.__file__).parent / "package_data"
+PLOTLY_JS_URL = f"plotly/plotly.min.js?v={plotly.__version__}"
 
-def players_performance_comparison(details_df):
-    players = pd.concat([details_df["White_Player"], details_df["Black_Player"]]).unique()
-    stats_list = []
 
-    for player in players:
-        white_wins = ((details_df["White_Player"] == player) & (details_df["Result"] == "1-0")).sum()
-        white_draws = ((details_df["White_Player"] == player) & (details_df["Result"] == "1/2-1/2")).sum()
-        black_wins = ((details_df["Black_Player"] == player) & (details_df["Result"] == "0-1")).sum()
-        black_draws = ((details_df["Black_Player"] == player) & (details_df["Result"] == "1/2-1/2")).sum()
+def figure_to_html(fig):
+    """HTML de una figura con solo sus datos en JSON; la librería la carga la página una vez."""
+    return pio.to_html(fig, include_plotlyjs=False, full_html=False)
 
-        stats_list.append({
-            "Player": player,
-            "White_Score": white_wins + white_draws * 0.5,
-            "Black_Score": black_wins + black_draws * 0.5
-        })
 
-    players_stats = pd.DataFrame(stats_list)
-    players_stats["Total Score"] = players_stats["White_Score"] + players_stats["Black_Score"]
-    players_stats = players_stats.sort_values(by="Total Score", ascending=False)
+# Categorías de evaluación de peor a mejor y color del bando con ventaja en cada una
+EVAL_CATEGORIES = ["Decisiva Peor", "Clara Peor", "Ligera Peor", "Igualdad", "Ligera Mejor", "Clara Mejor", "Decisiva Mejor"]
+ADVANTAGE_COLORS = np.array(["black", "black", "black", "gray", "white", "white", "white"])
+
+
+def categorize_evaluations(evaluations, is_white=True):
+    """Clasifica de una vez todas las evaluaciones (en peones, desde el lado de blancas).
+
+    is_white puede ser un booleano o un array: en las jugadas de negras se invierte el signo
+    para clasificar desde el punto de vista de quien mueve. Devuelve un Categorical con
+    EVAL_CATEGORIES como categorías.
+    """
+    # Las evaluaciones van en centipeones; redondear evita que un float32 (snapshots) cambie de categoría en los umbrales
+    values = np.asarray(evaluations, dtype=float).round(2)
+    values = np.where(is_white, values, -values)
+    codes = np.select(
+        [values >= 1.6, values >= 0.7, values >= 0.3, values > -0.3, values >= -0.69, values >= -1.59],
+        [6, 5, 4, 3, 2, 1],
+        default=0
+    )
+    return pd.Categorical.from_codes(codes, categories=EVAL_CATEGORIES)
+
+
+
+def players_performance_comparison(standings):
+    """Puntos con cada color por jugador, en el orden de la clasificación."""
+    players_stats = pd.DataFrame({
+        "Player": standings["Player"],
+        "White_Score": standings["White_Points"],
+        "Black_Score": standings["Black_Points"]
+    })
 
     fig = go.Figure()
 
@@ -34,7 +56,7 @@ def players_performance_comparison(details_df):
         y=players_stats["White_Score"],
         name="Puntuación con Blancas",
         marker_color="white",
-        text=players_stats.apply(lambda row: f"{row['Player']}<br>Blancas: {row['White_Score']:.1f}", axis=1),
+        text=players_stats["Player"] + "<br>Blancas: " + players_stats["White_Score"].map("{:.1f}".format),
         hovertemplate="%{text}<extra></extra>",
         textposition="none"
     ))
@@ -44,7 +66,7 @@ def players_performance_comparison(details_df):
         y=players_stats["Black_Score"],
         name="Puntuación con Negras",
         marker_color="black",
-        text=players_stats.apply(lambda row: f"{row['Player']}<br>Negras: {row['Black_Score']:.1f}", axis=1),
+        text=players_stats["Player"] + "<br>Negras: " + players_stats["Black_Score"].map("{:.1f}".format),
         hovertemplate="%{text}<extra></extra>",
         textposition="none"
     ))
@@ -58,25 +80,17 @@ def players_performance_comparison(details_df):
         showlegend=False
     )
 
-    graph_html = pio.to_html(fig, full_html=False)
-    return graph_html
-
-def players_wins_comparison(details_df):
-    players = pd.concat([details_df["White_Player"], details_df["Black_Player"]]).unique()
-    stats_list = []
-
-    for player in players:
-        white_wins = ((details_df["White_Player"] == player) & (details_df["Result"] == "1-0")).sum()
-        black_wins = ((details_df["Black_Player"] == player) & (details_df["Result"] == "0-1")).sum()
-        stats_list.append({
-            "Player": player,
-            "Wins with White": white_wins,
-            "Wins with Black": black_wins
-        })
+    return fig
 
-    players_stats = pd.DataFrame(stats_list)
-    players_stats["Total Wins"] = players_stats["Wins with White"] + players_stats["Wins with Black"]
-    players_stats = players_stats.sort_values(by="Total Wins", ascending=False)
+def players_wins_comparison(standings):
+    players_stats = pd.DataFrame({
+        "Player": standings["Player"],
+        "Wins with White": standings["White_Wins"],
+        "Wins with Black": standings["Black_Wins"],
+        "Total Wins": standings["Wins"]
+    })
+    # Orden estable: a igualdad de victorias se mantiene el orden de la clasificación
+    players_stats = players_stats.sort_values(by="Total Wins", ascending=False, kind="stable")
 
     fig = go.Figure()
 
@@ -85,7 +99,7 @@ def players_wins_comparison(details_df):
         y=players_stats["Wins with White"],
         name="Victorias con Blancas",
         marker_color="white",
-        text=players_stats.apply(lambda row: f"{row['Player']}<br>Blancas: {row['Wins with White']}", axis=1),
+        text=players_stats["Player"] + "<br>Blancas: " + players_stats["Wins with White"].astype(str),
         hovertemplate="%{text}<extra></extra>",
         textposition="none"
     ))
@@ -95,7 +109,7 @@ def players_wins_comparison(details_df):
         y=players_stats["Wins with Black"],
         name="Victorias con Negras",
         marker_color="black",
-        text=players_stats.apply(lambda row: f"{row['Player']}<br>Negras: {row['Wins with Black']}", axis=1),
+        text=players_stats["Player"] + "<br>Negras: " + players_stats["Wins with Black"].astype(str),
         hovertemplate="%{text}<extra></extra>",
         textposition="none"
     ))
@@ -109,11 +123,15 @@ def players_wins_comparison(details_df):
         showlegend=False
     )
 
-    graph_html = pio.to_html(fig, full_html=False)
-    return graph_html
+    return fig
 
-def opening_effect(details_df):
-    top_openings = details_df["OpeningName"].value_counts().head(10).index
+def opening_results_stats(details_df, top=10):
+    """Resultados de las aperturas más jugadas, calculados en pandas."""
+    counts = details_df["OpeningName"].value_counts(sort=False)
+    # Los empates se deshacen por el _id más pequeño, igual que openings_pipeline
+    first_seen = details_df.groupby("OpeningName", observed=True)["_id"].min()
+    ranking = pd.DataFrame({"Games": counts, "First": first_seen.reindex(counts.index)})
+    top_openings = ranking.sort_values(by=["Games", "First"], ascending=[False, True]).head(top).index
     filtered_df = details_df[details_df["OpeningName"].isin(top_openings)]
 
     results = []
@@ -130,7 +148,12 @@ def opening_effect(details_df):
             "Draws": (games["Result"] == "1/2-1/2").sum()
         })
 
-    results_df = pd.DataFrame(results)
+    return pd.DataFrame(results, columns=["ECO", "Tooltip", "White Wins", "Black Wins", "Draws"])
+
+
+def opening_effect(details_df, results_df=None):
+    if results_df is None:
+        results_df = opening_results_stats(details_df)
 
     fig = go.Figure()
 
@@ -221,8 +244,10 @@ def get_player_info(player_name, details_df):
     ]
     
     if not player_info.empty:
-        player_elo = player_info.iloc[0]["White_Elo"] if "White_Elo" in player_info else "Desconocido"
-        fide_id = player_info.iloc[0]["White_Fide_ID"] if "White_Fide_ID" in player_info else "No disponible"
+        # Los datos del jugador están en las columnas del color con el que jugó esa partida
+        color = "White" if player_info.iloc[0]["White_Player"] == player_name else "Black"
+        player_elo = player_info.iloc[0][f"{color}_Elo"] if f"{color}_Elo" in player_info else "Desconocido"
+        fide_id = player_info.iloc[0][f"{color}_Fide_ID"] if f"{color}_Fide_ID" in player_info else "No disponible"
     else:
         player_elo = "Desconocido"
         fide_id = "No disponible"
@@ -231,36 +256,20 @@ def get_player_info(player_name, details_df):
 
 
 
-def engine_evaluation(round_number, moves_df, show_colors=True):
-    game_moves = moves_df[moves_df["Round"] == round_number].copy()
+def engine_evaluation(game_moves, show_colors=True):
+    """Evaluación del motor en cada jugada de una partida (jugadas ya ordenadas, como las de load_game_moves)."""
     if game_moves.empty:
         return go.Figure()
 
-    game_moves["Color Order"] = game_moves["Color"].map({"White": 0, "Black": 1})
-    game_moves = game_moves.sort_values(by=["Move Number", "Color Order"]).drop(columns=["Color Order"])
+    game_moves = game_moves.copy()
     game_moves["Adjusted Move Number"] = game_moves["Move Number"] + game_moves["Color"].map({"White": 0, "Black": 0.5})
 
     move_numbers = game_moves["Adjusted Move Number"]
     evaluations = game_moves["Evaluation"]
 
-    def categorize_eval(eval_value):
-        if eval_value >= 1.6:
-            return "Decisiva Mejor", "white"
-        elif eval_value >= 0.7:
-            return "Clara Mejor", "white"
-        elif eval_value >= 0.3:
-            return "Ligera Mejor", "white"
-        elif eval_value > -0.3:
-            return "Igualdad", "gray"
-        elif eval_value >= -0.69:
-            return "Ligera Peor", "black"
-        elif eval_value >= -1.59:
-            return "Clara Peor", "black"
-        else:
-            return "Decisiva Peor", "black"
-
-    game_moves[["Evaluation Category", "Advantage Color"]] = game_moves["Evaluation"].apply(lambda x: pd.Series(categorize_eval(x)))
-
+    categories = categorize_evaluations(evaluations)
+    game_moves["Evaluation Category"] = np.asarray(categories)
+    game_moves["Advantage Color"] = ADVANTAGE_COLORS[categories.codes]
 
     fig = go.Figure()
 
@@ -294,8 +303,8 @@ def engine_evaluation(round_number, moves_df, show_colors=True):
     return fig
 
 
-def plot_player_times(round_number, moves_df):
-    game_moves = moves_df[moves_df["Round"] == round_number].copy()
+def plot_player_times(game_moves):
+    game_moves = game_moves.copy()
 
     color_map = {"White": "white", "Black": "black"}
 
@@ -356,8 +365,8 @@ def format_time(seconds):
     secs = int(seconds % 60)
     return f"{minutes:02d}:{secs:02d}"
 
-def time_vs_eval_change_single_game(moves_df, round_number, num_ticks=10):
-    game_moves = moves_df[moves_df["Round"] == round_number].copy()
+def time_vs_eval_change_single_game(game_moves, num_ticks=10):
+    game_moves = game_moves.copy()
 
     game_moves["Time (seconds)"] = pd.to_numeric(game_moves["Time (seconds)"], errors="coerce")
     game_moves.dropna(subset=["Evaluation", "Time (seconds)"], inplace=True)
@@ -365,11 +374,7 @@ def time_vs_eval_change_single_game(moves_df, round_number, num_ticks=10):
     game_moves["Time Net"] = game_moves["Time (seconds)"] - 30
     game_moves["Time Net"] = game_moves["Time Net"].apply(lambda x: max(x, 0))
 
-    game_moves["Color Order"] = game_moves["Color"].map({"White": 0, "Black": 1})
-    game_moves.sort_values(by=["Move Number", "Color Order"], inplace=True)
-    game_moves.drop(columns=["Color Order"], inplace=True)
-
-    game_moves["Time Difference"] = - (game_moves["Time Net"] - game_moves.groupby("Color")["Time (seconds)"].shift(1))
+    game_moves["Time Difference"] = - (game_moves["Time Net"] - game_moves.groupby("Color", observed=True)["Time (seconds)"].shift(1))
     game_moves["Eval Change"] = game_moves["Evaluation"].diff()
     game_moves.dropna(subset=["Time Difference", "Eval Change"], inplace=True)
 
@@ -471,45 +476,32 @@ def elo_vs_result(details_df):
     return fig
 
 
-def categorize_stockfish_eval(eval_value, is_white):
-    if not is_white:
-        eval_value = -eval_value
-
-    if eval_value >= 1.6:
-        return "Decisiva Mejor"
-    elif eval_value >= 0.7:
-        return "Clara Mejor"
-    elif eval_value >= 0.3:
-        return "Ligera Mejor"
-    elif eval_value > -0.3:
-        return "Igualdad"
-    elif eval_value >= -0.69:
-        return "Ligera Peor"
-    elif eval_value >= -1.59:
-        return "Clara Peor"
-    else:
-        return "Decisiva Peor"
-
 def evaluation_distribution_plotly(details_df, moves_df):
-    merged_df = moves_df.merge(details_df, on="Round", how="left")
-
-    merged_df["Player"] = merged_df.apply(
-        lambda row: row["White_Player"] if row["Move Number"] % 2 != 0 else row["Black_Player"],
-        axis=1
-    )
-
-    merged_df["Is_White"] = merged_df["Move Number"] % 2 != 0
-
-    merged_df["Eval Category"] = merged_df.apply(
-        lambda row: categorize_stockfish_eval(row["Evaluation"], row["Is_White"]),
-        axis=1
-    )
-
-    eval_counts = merged_df.groupby(["Player", "Eval Category"]).size().unstack(fill_value=0)
+    """Porcentaje de jugadas de cada jugador en cada categoría de evaluación.
+
+    Cada jugada se asigna a su partida por GameId y al jugador por su columna Color.
+    """
+    # Solo se buscan las partidas distintas; cada jugada usa el código de su partida
+    game_ids = moves_df["GameId"].astype("category")
+    positions = pd.Index(details_df["_id"]).get_indexer(game_ids.cat.categories)[game_ids.cat.codes.values]
+    known = positions >= 0
+    positions = positions[known]
+
+    is_white = np.asarray(moves_df["Color"] == "White")[known]
+    categories = categorize_evaluations(moves_df["Evaluation"].values[known], is_white)
+
+    # Jugadores codificados una vez por partida: los primeros len(details_df) códigos son los de blancas
+    player_codes, player_names = pd.factorize(pd.concat([details_df["White_Player"], details_df["Black_Player"]]))
+    move_players = np.where(is_white, player_codes[positions], player_codes[len(details_df) + positions])
+    valid = move_players >= 0
+
+    n_categories = len(EVAL_CATEGORIES)
+    counts = np.bincount(move_players[valid] * n_categories + categories.codes[valid],
+                         minlength=len(player_names) * n_categories).reshape(-1, n_categories)
+    eval_counts = pd.DataFrame(counts, index=pd.Index(player_names, name="Player"), columns=EVAL_CATEGORIES)
+    eval_counts = eval_counts[eval_counts.sum(axis=1) > 0].sort_index()
     eval_percentage = eval_counts.div(eval_counts.sum(axis=1), axis=0) * 100
-
-    eval_order = ["Decisiva Peor", "Clara Peor", "Ligera Peor", "Igualdad", "Ligera Mejor", "Clara Mejor", "Decisiva Mejor"]
-    eval_percentage = eval_percentage[eval_order].reset_index()
+    eval_percentage = eval_percentage.reset_index()
 
     eval_data = eval_percentage.melt(id_vars="Player", var_name="Estado de la Posición", value_name="Porcentaje")
 
@@ -543,25 +535,69 @@ def evaluation_distribution_plotly(details_df, moves_df):
     return fig
 
 
-def create_chess_heatmap_plotly(moves_df, round_number, color):
-    game_moves = moves_df[(moves_df["Round"] == round_number) & (moves_df["Color"] == color)].copy()
+PIECE_TYPES = {1: "Peón", 2: "Caballo", 3: "Alfil", 4: "Torre", 5: "Dama", 6: "Rey"}
+SAN_PIECES = {"N": 2, "B": 3, "R": 4, "Q": 5, "K": 6, "O": 6}
 
-    files = 'abcdefgh'
-    ranks = '12345678'
 
-    board = np.zeros((8, 8), dtype=int)
+def move_geometry(moves_df):
+    """Casilla de destino (0-63, a1 = 0) y tipo de pieza de cada jugada.
+
+    Se usan las columnas To y Piece que guarda el importador; en las jugadas importadas antes
+    de guardarlas se deducen del SAN, incluido el enroque. Las que no se pueden deducir quedan a -1.
+    """
+    if "To" in moves_df and "Piece" in moves_df:
+        # Todas las jugadas tienen la geometría guardada: no hay nada que convertir
+        # (con los tipos compactos, las que faltan son nulos de Int8 y la columna también es entera)
+        geometry = moves_df[["To", "Piece"]]
+        if all(pd.api.types.is_integer_dtype(dtype) for dtype in geometry.dtypes) and not geometry.isna().any().any():
+            return moves_df["To"].to_numpy(dtype=int), moves_df["Piece"].to_numpy(dtype=int)
+        to_squares = moves_df["To"].to_numpy(dtype=float, na_value=np.nan, copy=True)
+        pieces = moves_df["Piece"].to_numpy(dtype=float, na_value=np.nan, copy=True)
+    else:
+        to_squares = np.full(len(moves_df), np.nan)
+        pieces = np.full(len(moves_df), np.nan)
+
+    missing = np.isnan(to_squares)
+    if missing.any():
+        old_moves = moves_df[missing]
+        san = old_moves["Move"].fillna("").astype(str)
+        square = san.str.extract(r'.*([a-h])([1-8])')
+        parsed_to = (square[1].astype(float) - 1) * 8 + square[0].map({f: i for i, f in enumerate("abcdefgh")})
 
-    for move in game_moves['Move'].dropna():
-        matches = re.findall(r'[a-h][1-8]', move)
-        if not matches:
-            continue
-        to_square = matches[-1]
-        file = to_square[0]
-        rank = to_square[1]
+        # El enroque no nombra casillas: el rey va a g1/c1 o g8/c8
+        back_rank = np.where(old_moves["Color"] == "White", 0, 56)
+        parsed_to = np.select([san.str.startswith("O-O-O"), san.str.startswith("O-O")],
+                              [back_rank + 2, back_rank + 6], parsed_to)
+        parsed_piece = san.str[:1].map(SAN_PIECES).fillna(1).where(san != "", 0)
 
-        row = 8 - int(rank)
-        col = files.index(file)
-        board[row, col] += 1
+        to_squares[missing] = parsed_to
+        pieces[missing] = parsed_piece.to_numpy(dtype=float)
+
+    return np.nan_to_num(to_squares, nan=-1).astype(int), np.nan_to_num(pieces, nan=0).astype(int)
+
+
+def square_counts(to_squares):
+    """Jugadas por casilla de destino como tablero 8x8, con la octava fila arriba."""
+    to_squares = np.asarray(to_squares)
+    return np.bincount(to_squares[to_squares >= 0], minlength=64).reshape(8, 8)[::-1]
+
+
+def create_chess_heatmap_plotly(game_moves, color):
+    to_squares, _ = move_geometry(game_moves[game_moves["Color"] == color])
+    return square_heatmap(square_counts(to_squares))
+
+
+def player_square_heatmap(moves_df, piece=None):
+    """Mapa de calor de las casillas de destino de un conjunto de jugadas, opcionalmente de un tipo de pieza."""
+    to_squares, pieces = move_geometry(moves_df)
+    if piece:
+        to_squares = to_squares[pieces == piece]
+    return square_heatmap(square_counts(to_squares))
+
+
+def square_heatmap(board):
+    files = 'abcdefgh'
+    ranks = '12345678'
 
     fig = go.Figure(data=go.Heatmap(
         z=board,
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+WHITE_POINTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+STANDINGS_COLUMNS = ["Rank", "Player", "Points", "Games", "Wins", "Draws", "Losses",
+                     "White_Points", "White_Wins", "White_Draws", "White_Losses",
+                     "Black_Points", "Black_Wins", "Black_Draws", "Black_Losses", "Black_Games",
+                     "Buchholz", "Sonneborn_Berger"]
+
+
+def compute_standings(games_df):
+    """Clasificación del torneo a partir de una fila por partida (White_Player, Black_Player, Result).
+
+    Cada partida se desdobla en una fila por jugador y todos los totales salen de una sola
+    agrupación. Los desempates son Buchholz (suma de los puntos de los rivales),
+    Sonneborn-Berger (puntos de los rivales ponderados por el resultado contra ellos) y el
+    número de partidas con negras. Las partidas sin resultado no puntúan ni cuentan como jugadas.
+    """
+    if games_df.empty:
+        return pd.DataFrame(columns=STANDINGS_COLUMNS)
+
+    white_points = games_df["Result"].map(WHITE_POINTS).astype(float)
+    n = len(games_df)
+    long_df = pd.DataFrame({
+        "Player": np.concatenate([games_df["White_Player"].values, games_df["Black_Player"].values]),
+        "Opponent": np.concatenate([games_df["Black_Player"].values, games_df["White_Player"].values]),
+        "Is_White": np.repeat([True, False], n),
+        "Points": np.concatenate([white_points.values, 1 - white_points.values])
+    })
+
+    played = long_df["Points"].notna()
+    win = long_df["Points"] == 1
+    draw = long_df["Points"] == 0.5
+    loss = long_df["Points"] == 0
+    points = long_df["Points"].fillna(0)
+    white = long_df["Is_White"]
+    black = ~white
+
+    columns = pd.DataFrame({
+        "Player": long_df["Player"],
+        "Points": points,
+        "Games": played,
+        "Wins": win,
+        "Draws": draw,
+        "Losses": loss,
+        "White_Points": points.where(white, 0),
+        "White_Wins": win & white,
+        "White_Draws": draw & white,
+        "White_Losses": loss & white,
+        "Black_Points": points.where(black, 0),
+        "Black_Wins": win & black,
+        "Black_Draws": draw & black,
+        "Black_Losses": loss & black,
+        "Black_Games": played & black
+    })
+    totals = columns.groupby("Player", sort=False, observed=True).sum()
+    opponents = pd.DataFrame({
+        "Player": long_df["Player"],
+        "Opponent": long_df["Opponent"],
+        "Games": played.astype(int),
+        "Points": points
+    })
+    return rank_standings(totals, opponents)
+
+
+def rank_standings(totals, opponents):
+    """Añade los desempates a los totales de cada jugador (índice Player) y los ordena.
+
+    opponents tiene una fila por jugador y rival (o por partida) con las partidas jugadas
+    entre ellos (Games) y los puntos que ha sacado el jugador (Points).
+    """
+    # Los desempates necesitan los puntos finales de cada rival
+    opponent_points = opponents["Opponent"].map(totals["Points"]).fillna(0)
+    tiebreaks = pd.DataFrame({
+        "Player": opponents["Player"],
+        "Buchholz": opponent_points * opponents["Games"],
+        "Sonneborn_Berger": opponent_points * opponents["Points"]
+    }).groupby("Player", sort=False, observed=True).sum()
+    standings = totals.join(tiebreaks).reset_index()
+
+    count_columns = [col for col in STANDINGS_COLUMNS if col.endswith(("Games", "Wins", "Draws", "Losses"))]
+    points_columns = [col for col in STANDINGS_COLUMNS if col.endswith(("Points", "Buchholz", "Berger"))]
+    standings = standings.astype({**{col: int for col in count_columns}, **{col: float for col in points_columns}})
+    standings = standings.sort_values(
+        by=["Points", "Buchholz", "Sonneborn_Berger", "Black_Games", "Player"],
+        ascending=[False, False, False, False, True]
+    ).reset_index(drop=True)
+    standings["Rank"] = np.arange(1, len(standings) + 1)
+
+    return standings[STANDINGS_COLUMNS]
@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+class TournamentRegistry:
+    """Nombres, identificadores y versiones de datos de los torneos, en memoria y compartidos por el proceso.
+
+    refresh comprueba como mucho una vez cada min_interval segundos una huella barata de la
+    colección (número de torneos, último _id y suma de DataVersion) y solo vuelve a leer los
+    torneos si ha cambiado. on_version_change, si se indica, se llama con el _id de cada torneo
+    cuya versión de datos ha cambiado o que ya no existe.
+    """
+
+    def __init__(self, collection, min_interval=1.0, on_version_change=None):
+        self.collection = collection
+        self.min_interval = min_interval
+        self.on_version_change = on_version_change
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.data_versions = {}
+        self.stamp = None
+        self.checked = None
+
+    def refresh(self, force=False):
+        changed = []
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.checked is not None and now - self.checked < self.min_interval:
+                return
+            self.checked = now
+
+            stamp = next(self.collection.aggregate([
+                {"$group": {"_id": None, "Count": {"$sum": 1}, "Last": {"$max": "$_id"},
+                            "Versions": {"$sum": "$DataVersion"}}}
+            ]), None)
+            stamp = (stamp["Count"], stamp["Last"], stamp["Versions"]) if stamp else None
+            if stamp == self.stamp and not force:
+                return
+
+            ids = {}
+            data_versions = {}
+            for doc in self.collection.find({}, {"Name": 1, "DataVersion": 1}):
+                ids[doc["Name"]] = doc["_id"]
+                data_versions[doc["_id"]] = doc.get("DataVersion", 0)
+            changed = [tournament_id for tournament_id, version in self.data_versions.items()
+                       if data_versions.get(tournament_id) != version]
+            self.ids, self.data_versions, self.stamp = ids, data_versions, stamp
+
+        if self.on_version_change is not None:
+            for tournament_id in changed:
+                self.on_version_change(tournament_id)
+
+    def names(self):
+        return tuple(self.ids)
+
+    def id_for(self, name):
+        return self.ids.get(name)
+
+    def version(self, tournament_id):
+        return self.data_versions.get(tournament_id, 0)
+
+    def versions(self):
+        return dict(self.data_versions)
+
+    def __contains__(self, name):
+        return name in self.ids